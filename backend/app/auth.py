@@ -1,20 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+import asyncio
+import hmac
+import logging
+import os
+import threading
+import time
+import jwt
+from cachetools import TTLCache
+from jwt.exceptions import InvalidTokenError as JWTError
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 
+logger = logging.getLogger("auth")
+
 # Configuration
 SECRET_KEY = "your-secret-key-change-this-in-production-use-openssl-rand-hex-32"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# HMAC key as bytes, encoded once instead of on every sign/verify
+_SECRET = SECRET_KEY.encode()
+
+# Password hashing: new hashes use argon2id, existing bcrypt hashes still verify
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__rounds=2,
+    argon2__memory_cost=19456,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# bcrypt is CPU-bound, so logins run on their own pool instead of the event loop
+_BCRYPT_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="bcrypt")
+
+# Verified tokens -> (user, exp) so repeat requests skip signature checks
+TOKEN_CACHE_TTL_SECONDS = 60
+_token_cache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL_SECONDS)
+_token_cache_lock = threading.Lock()
+
 # Models
 class Token(BaseModel):
     access_token: str
@@ -38,9 +65,12 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
-# Pre-hashed passwords (generated with bcrypt)
-ADMIN_PASSWORD_HASH = get_password_hash("admin123")
-DEMO_PASSWORD_HASH = get_password_hash("demo123")
+# Pre-hashed passwords (generated offline with bcrypt, so imports don't pay for hashing)
+ADMIN_PASSWORD_HASH = "$2b$12$VOswCNaiHLzYOYxy.K14hOs2BKdnDkScZl2Ay4bJ.ZC07Tk2haGXG"  # admin123
+DEMO_PASSWORD_HASH = "$2b$12$mGSAHKge9OhBWfOxdF9l6Ogm9RQVCpw6Ei.JztJqwL7M/skc6ckWK"  # demo123
+
+# Verified against on unknown usernames so every failed login costs one bcrypt check
+_DUMMY_HASH = "$2b$12$AjZFGwh3TDcpONwQj91S.OTYa5L1GybWs4kHEF9UbGZuRP2AwEqKu"
 
 # Fake database of users (in production, use a real database)
 fake_users_db = {
@@ -74,16 +104,25 @@ def get_user(username: str) -> Optional[UserInDB]:
 
 def authenticate_user(username: str, password: str) -> Optional[UserInDB]:
     """Authenticate a user"""
-    print(f"🔐 Authenticating user: {username}")
-    user = get_user(username)
-    if not user:
-        print(f"❌ User not found: {username}")
+    user_dict = fake_users_db.get(username)
+    if user_dict is None:
+        # Do the same bcrypt work as a real check so timing doesn't reveal unknown users
+        pwd_context.verify(password, _DUMMY_HASH)
+        logger.warning("auth_fail user=%s", username)
         return None
-    if not verify_password(password, user.hashed_password):
-        print(f"❌ Invalid password for user: {username}")
+    
+    username_ok = hmac.compare_digest(username.encode(), user_dict["username"].encode())
+    password_ok = verify_password(password, user_dict["hashed_password"])
+    if not (username_ok and password_ok):
+        logger.warning("auth_fail user=%s", username)
         return None
-    print(f"✅ Authentication successful for: {username}")
-    return user
+    logger.info("auth_ok user=%s", username)
+    return UserInDB(**user_dict)
+
+async def aauthenticate_user(username: str, password: str) -> Optional[UserInDB]:
+    """Authenticate a user without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_BCRYPT_EXECUTOR, authenticate_user, username, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
@@ -94,29 +133,52 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _SECRET, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    """Get current user from JWT token"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def decode_token(token: str) -> Optional[UserInDB]:
+    """Resolve a JWT to its user, or None if the token is invalid"""
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+    if cached is not None:
+        user, expire = cached
+        if expire > time.time():
+            return user
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+        payload = jwt.decode(token, _SECRET, algorithms=[ALGORITHM])
+        token_data = TokenData(username=payload.get("sub"))
     except JWTError:
-        raise credentials_exception
+        return None
+    if token_data.username is None:
+        return None
     
     user = get_user(username=token_data.username)
     if user is None:
-        raise credentials_exception
+        return None
+    
+    with _token_cache_lock:
+        _token_cache[token] = (user, payload["exp"])
+    return user
+
+async def authenticate_request(request: Request, call_next):
+    """HTTP middleware: decode the bearer token once and store the user on request.state"""
+    request.state.user = None
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        request.state.user = decode_token(token)
+    return await call_next(request)
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> User:
+    """Get current user from JWT token"""
+    # Normally resolved by authenticate_request; decode here if the middleware isn't installed
+    user = getattr(request.state, "user", None) or decode_token(token)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -127,8 +189,9 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
 
 # Test the authentication when running directly
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     print("Testing authentication module...")
-    print("\n✅ Password hashes generated successfully")
+    print("\n✅ Password hashes loaded")
     print(f"Admin hash: {ADMIN_PASSWORD_HASH[:50]}...")
     print(f"Demo hash: {DEMO_PASSWORD_HASH[:50]}...")
     
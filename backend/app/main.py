@@ -1,22 +1,66 @@
 from fastapi import APIRouter, Depends
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import StreamingResponse
-from io import BytesIO
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import numpy as np
+import orjson
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from tempfile import SpooledTemporaryFile
+from typing import Literal, Optional
+from logging.handlers import QueueHandler, QueueListener
+import logging
 import os
+import queue
 import sys
 
+logging.getLogger("cmdstanpy").propagate = False  # Prophet's Stan backend logs through its own handler
+
+def start_queue_logging():
+    """
+    Route root logging through a queue drained by a background thread
+    
+    Log calls only enqueue the record; the listener thread owns the stderr
+    writes. Called from lifespan rather than at import, because
+    `python app/main.py` imports this module twice (as __main__ and as main)
+    and an import-time handler would emit every record twice.
+    Returns (queue_handler, listener) for stop_queue_logging.
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    listener = QueueListener(log_queue, stream_handler)
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setLevel(logging.INFO)
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(logging.INFO)
+    listener.start()
+    return queue_handler, listener
+
+def stop_queue_logging(queue_handler, listener):
+    """Detach the queue handler and flush what the listener has left"""
+    logging.getLogger().removeHandler(queue_handler)
+    listener.stop()
+
+# Slices of the shared frames stay views until written to, so handlers
+# can filter and reformat without copying daily_df/weekly_df
+pd.options.mode.copy_on_write = True
+
 # Add services directory to path
 sys.path.append(os.path.dirname(__file__))
 
 # Import auth functions
 try:
     from auth import (
-        authenticate_user,
+        aauthenticate_user,
+        authenticate_request,
         create_access_token,
         get_current_active_user,
         Token,
@@ -48,10 +92,32 @@ except ImportError as e:
     print(f"⚠️ Warning: PDF generator not found: {e}")
     pdf_generator = None
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load data and warm the forecast models before serving; flush logs on exit"""
+    log_handler, log_listener = start_queue_logging()
+    try:
+        await load_data()
+        
+        # Each worker fits its own models, so do it here rather than on the first request
+        if daily_df is not None and forecaster is not None:
+            try:
+                await asyncio.to_thread(forecaster.warm, daily_df)
+                print("✅ Forecast models warmed")
+            except Exception as e:
+                print(f"⚠️ Warning: Forecast warm-up failed: {e}")
+        
+        yield
+    finally:
+        # Also on a failed startup or shutdown, so the root handler is never left swapped
+        stop_queue_logging(log_handler, log_listener)
+
 app = FastAPI(
     title="AI Analytics Dashboard API",
     description="Business analytics API with ML forecasting",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Enable CORS for frontend communication
@@ -63,55 +129,110 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON bodies (forecasts, long metric ranges); level 5 keeps CPU cost low
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Resolve the bearer token once per request; auth dependencies read request.state.user
+if AUTH_ENABLED:
+    app.middleware("http")(authenticate_request)
+
 # Load data at startup
 DATA_DIR = "app/data"
 daily_df = None
 weekly_df = None
+_date_index = None  # Sorted datetime64 values of daily_df['date']
+_date_labels = None  # daily_df['date'] formatted as YYYY-MM-DD, row-aligned
+_week_labels = None  # weekly_df['week'] formatted as YYYY-MM-DD, row-aligned
+_cumsum = {}  # Prefix sums of the integer METRIC_COLUMNS, each of length len(daily_df) + 1
+_summary_bytes = None  # Pre-serialized /api/metrics/summary body
+
+METRIC_COLUMNS = [
+    'daily_revenue', 'orders', 'sales_units', 'active_customers',
+    'new_customers', 'churned_customers', 'avg_order_value', 'churn_rate'
+]
+
+def read_metrics(name, date_col, dtype=None):
+    """
+    Read a metrics table from DATA_DIR
+    
+    The CSV is the source of truth. The Parquet copy (see
+    convert_csv_to_parquet.py) is used only when it is at least as new as
+    the CSV, so an edited or freshly pulled CSV is never shadowed by a
+    stale conversion. Returns None if neither file exists.
+    """
+    parquet_path = os.path.join(DATA_DIR, f"{name}.parquet")
+    csv_path = os.path.join(DATA_DIR, f"{name}.csv")
+    has_parquet = os.path.exists(parquet_path)
+    has_csv = os.path.exists(csv_path)
+    
+    if has_parquet and (not has_csv or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)):
+        df = pd.read_parquet(parquet_path)
+        # Same dtypes as the CSV path, whichever tool wrote the Parquet file
+        return df.astype(dtype) if dtype else df
+    if has_csv:
+        return pd.read_csv(csv_path, parse_dates=[date_col], dtype=dtype)
+    return None
 
-@app.on_event("startup")
 async def load_data():
-    """Load CSV data on startup"""
-    global daily_df, weekly_df
+    """Load metrics data on startup"""
+    global daily_df, weekly_df, _date_index, _date_labels, _week_labels, _cumsum, _summary_bytes
     
-    daily_path = os.path.join(DATA_DIR, "daily_metrics.csv")
-    weekly_path = os.path.join(DATA_DIR, "weekly_metrics.csv")
+    # Cached results are derived from the frames below
+    _compute_kpis.cache_clear()
+    _cached_forecast.cache_clear()
+    _cached_backtest.cache_clear()
     
-    if os.path.exists(daily_path):
-        daily_df = pd.read_csv(daily_path)
-        daily_df['date'] = pd.to_datetime(daily_df['date'])
+    daily_df = read_metrics(
+        "daily_metrics", "date",
+        dtype={'orders': 'int32', 'active_customers': 'int32'}
+    )
+    weekly_df = read_metrics("weekly_metrics", "week")
+    
+    if daily_df is not None:
+        daily_df = daily_df.sort_values('date', ignore_index=True)
+        _date_index = daily_df['date'].values
+        _date_labels = daily_df['date'].dt.strftime('%Y-%m-%d').to_numpy()
+        _cumsum = {
+            col: np.concatenate(([0], daily_df[col].to_numpy().cumsum()))
+            for col in METRIC_COLUMNS
+            if pd.api.types.is_integer_dtype(daily_df[col])
+        }
+        _summary_bytes = orjson.dumps(_build_summary(), option=orjson.OPT_SERIALIZE_NUMPY)
         print(f"✅ Loaded {len(daily_df)} daily records")
     else:
-        print(f"⚠️ Warning: {daily_path} not found")
+        print(f"⚠️ Warning: daily_metrics data not found in {DATA_DIR}")
     
-    if os.path.exists(weekly_path):
-        weekly_df = pd.read_csv(weekly_path)
-        weekly_df['week'] = pd.to_datetime(weekly_df['week'])
+    if weekly_df is not None:
+        _week_labels = weekly_df['week'].dt.strftime('%Y-%m-%d').to_numpy()
         print(f"✅ Loaded {len(weekly_df)} weekly records")
     else:
-        print(f"⚠️ Warning: {weekly_path} not found")
+        print(f"⚠️ Warning: weekly_metrics data not found in {DATA_DIR}")
+
+# The health check body never changes after import, so serialize it once
+_ROOT_BYTES = orjson.dumps({
+    "status": "healthy",
+    "message": "AI Analytics Dashboard API",
+    "version": "1.0.0",
+    "authentication": "enabled" if AUTH_ENABLED else "disabled",
+    "endpoints": [
+        "/api/auth/login",
+        "/api/auth/me",
+        "/api/metrics/daily",
+        "/api/metrics/weekly",
+        "/api/metrics/kpis",
+        "/api/forecast/revenue",
+        "/api/forecast/orders",
+        "/api/forecast/customers",
+        "/api/forecast/churn",
+        "/api/forecast/all",
+        "/docs"
+    ]
+})
 
 @app.get("/")
 async def root():
     """API health check"""
-    return {
-        "status": "healthy",
-        "message": "AI Analytics Dashboard API",
-        "version": "1.0.0",
-        "authentication": "enabled" if AUTH_ENABLED else "disabled",
-        "endpoints": [
-            "/api/auth/login",
-            "/api/auth/me",
-            "/api/metrics/daily",
-            "/api/metrics/weekly",
-            "/api/metrics/kpis",
-            "/api/forecast/revenue",
-            "/api/forecast/orders",
-            "/api/forecast/customers",
-            "/api/forecast/churn",
-            "/api/forecast/all",
-            "/docs"
-        ]
-    }
+    return Response(_ROOT_BYTES, media_type="application/json")
 
 # ============================================
 # AUTHENTICATION ENDPOINTS
@@ -127,7 +248,7 @@ if AUTH_ENABLED:
         - Username: admin, Password: admin123
         - Username: demo, Password: demo123
         """
-        user = authenticate_user(form_data.username, form_data.password)
+        user = await aauthenticate_user(form_data.username, form_data.password)
         if not user:
             raise HTTPException(
                 status_code=401,
@@ -172,6 +293,17 @@ else:
 # METRICS ENDPOINTS
 # ============================================
 
+def parse_date_param(value: str, name: str) -> np.datetime64:
+    """Parse an ISO date query parameter, rejecting malformed input with a 400"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = None
+    # The data's dates are naive, and numpy deprecates aware datetimes, so offsets are rejected too
+    if parsed is None or parsed.tzinfo is not None:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: expected YYYY-MM-DD")
+    return np.datetime64(parsed)
+
 @app.get("/api/metrics/daily")
 async def get_daily_metrics(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
@@ -183,25 +315,26 @@ async def get_daily_metrics(
     if daily_df is None:
         raise HTTPException(status_code=500, detail="Data not loaded")
     
-    df = daily_df.copy()
-    
-    # Apply date filters
+    # Locate the date window on the sorted index instead of masking a copy
+    lo, hi = 0, len(daily_df)
     if start_date:
-        df = df[df['date'] >= pd.to_datetime(start_date)]
+        lo = _date_index.searchsorted(parse_date_param(start_date, "start_date"))
     if end_date:
-        df = df[df['date'] <= pd.to_datetime(end_date)]
+        hi = _date_index.searchsorted(parse_date_param(end_date, "end_date"), side='right')
     
-    # Apply limit (most recent days)
-    df = df.tail(limit)
+    # Apply limit (most recent days) as a positional slice
+    lo = max(lo, hi - limit)
+    df = daily_df.iloc[lo:hi]
     
-    # Convert to JSON-friendly format
-    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    # Swap in the date strings formatted at load time
+    df = df.assign(date=_date_labels[lo:hi])
     
-    return {
+    # Serialize with orjson directly, skipping FastAPI's generic encoder pass
+    return ORJSONResponse({
         "success": True,
         "count": len(df),
         "data": df.to_dict(orient='records')
-    }
+    })
 
 @app.get("/api/metrics/weekly")
 async def get_weekly_metrics(
@@ -212,224 +345,232 @@ async def get_weekly_metrics(
     if weekly_df is None:
         raise HTTPException(status_code=500, detail="Weekly data not loaded")
     
-    df = weekly_df.tail(limit).copy()
-    df['week'] = df['week'].dt.strftime('%Y-%m-%d')
+    df = weekly_df.tail(limit)
+    df = df.assign(week=_week_labels[len(weekly_df) - len(df):])
     
-    return {
+    return ORJSONResponse({
         "success": True,
         "count": len(df),
         "data": df.to_dict(orient='records')
-    }
+    })
 
-@app.get("/api/metrics/kpis")
-async def get_kpis(
-    days: int = Query(30, description="Number of days to calculate KPIs"),
-    current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
-):
-    """Get Key Performance Indicators (KPIs)"""
-    if daily_df is None:
-        raise HTTPException(status_code=500, detail="Data not loaded")
-    
-    # Current period
-    current_data = daily_df.tail(days)
-    
-    # Previous period (same length)
-    previous_data = daily_df.tail(days * 2).head(days)
-    
-    # Calculate KPIs
-    def calculate_change(current, previous):
-        if previous == 0:
-            return 0
-        return ((current - previous) / previous) * 100
+# Integer columns use exact prefix sums. Float columns reduce the slice itself:
+# differencing year-long float running totals leaves cancellation error that
+# can flip a round-half result in the 2-decimal KPIs.
+def _range_sum(col, lo, hi):
+    """Sum of daily_df[col] over rows [lo, hi)"""
+    if col in _cumsum:
+        return _cumsum[col][hi] - _cumsum[col][lo]
+    return daily_df[col].iloc[lo:hi].sum()
+
+def _range_mean(col, lo, hi):
+    """Mean of daily_df[col] over rows [lo, hi)"""
+    if col in _cumsum:
+        return _range_sum(col, lo, hi) / (hi - lo)
+    return daily_df[col].iloc[lo:hi].mean()
+
+# KPI name -> (source column, window reduction, reported as an integer)
+KPI_AGGREGATES = {
+    "total_revenue": ("daily_revenue", _range_sum, False),
+    "total_orders": ("orders", _range_sum, True),
+    "active_customers": ("active_customers", _range_mean, True),
+    "avg_order_value": ("avg_order_value", _range_mean, False),
+    "churn_rate": ("churn_rate", _range_mean, False),
+}
+
+def _kpi_values(days: int) -> dict:
+    """Unrounded KPIs for the last `days` days against the `days` before them"""
+    n = len(daily_df)
     
-    # Total Revenue
-    current_revenue = current_data['daily_revenue'].sum()
-    previous_revenue = previous_data['daily_revenue'].sum()
-    revenue_change = calculate_change(current_revenue, previous_revenue)
+    # Current period: the last `days` rows
+    cur_lo, cur_hi = max(n - days, 0), n
     
-    # Total Orders
-    current_orders = current_data['orders'].sum()
-    previous_orders = previous_data['orders'].sum()
-    orders_change = calculate_change(current_orders, previous_orders)
+    # Previous period: the `days` rows before it (clipped at the start of data)
+    prev_lo = max(n - days * 2, 0)
+    prev_hi = min(prev_lo + days, n)
     
-    # Active Customers (average)
-    current_customers = current_data['active_customers'].mean()
-    previous_customers = previous_data['active_customers'].mean()
-    customers_change = calculate_change(current_customers, previous_customers)
+    current = np.array([reduce(col, cur_lo, cur_hi) for col, reduce, _ in KPI_AGGREGATES.values()])
+    previous = np.array([reduce(col, prev_lo, prev_hi) for col, reduce, _ in KPI_AGGREGATES.values()])
     
-    # Average Order Value
-    current_aov = current_data['avg_order_value'].mean()
-    previous_aov = previous_data['avg_order_value'].mean()
-    aov_change = calculate_change(current_aov, previous_aov)
+    # Percent change for every KPI at once (0 where the previous value is 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes = np.where(previous == 0, 0.0, (current - previous) / previous * 100)
     
-    # Churn Rate (average)
-    current_churn = current_data['churn_rate'].mean()
-    previous_churn = previous_data['churn_rate'].mean()
-    churn_change = calculate_change(current_churn, previous_churn)
+    kpis = {}
+    for (name, (_, _, as_int)), cur, prev, change in zip(KPI_AGGREGATES.items(), current, previous, changes):
+        cast = int if as_int else float
+        kpis[name] = {
+            "value": cast(cur),
+            "change_percent": float(change),
+            "previous_value": cast(prev)
+        }
+    return kpis
+
+@lru_cache(maxsize=64)
+def _compute_kpis(days: int) -> dict:
+    """Build the KPI payload for the last `days` days (cached until data reload)"""
+    # np.round, not round(): the 2-decimal ties must resolve the way the
+    # pandas scalars in the per-request computation always rounded them
+    kpis = {
+        name: {
+            field: value if isinstance(value, int) else float(np.round(value, 2))
+            for field, value in metric.items()
+        }
+        for name, metric in _kpi_values(days).items()
+    }
+    kpis["churn_rate"]["unit"] = "%"
     
     return {
         "success": True,
         "period_days": days,
-        "kpis": {
-            "total_revenue": {
-                "value": round(current_revenue, 2),
-                "change_percent": round(revenue_change, 2),
-                "previous_value": round(previous_revenue, 2)
-            },
-            "total_orders": {
-                "value": int(current_orders),
-                "change_percent": round(orders_change, 2),
-                "previous_value": int(previous_orders)
-            },
-            "active_customers": {
-                "value": int(current_customers),
-                "change_percent": round(customers_change, 2),
-                "previous_value": int(previous_customers)
-            },
-            "avg_order_value": {
-                "value": round(current_aov, 2),
-                "change_percent": round(aov_change, 2),
-                "previous_value": round(previous_aov, 2)
-            },
-            "churn_rate": {
-                "value": round(current_churn, 2),
-                "change_percent": round(churn_change, 2),
-                "previous_value": round(previous_churn, 2),
-                "unit": "%"
-            }
-        }
+        "kpis": kpis
     }
 
-@app.get("/api/metrics/summary")
-async def get_summary(
+@app.get("/api/metrics/kpis")
+async def get_kpis(
+    days: int = Query(30, ge=1, description="Number of days to calculate KPIs"),
     current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
 ):
-    """Get overall summary statistics"""
+    """Get Key Performance Indicators (KPIs)"""
     if daily_df is None:
         raise HTTPException(status_code=500, detail="Data not loaded")
     
+    return _compute_kpis(days)
+
+def _build_summary() -> dict:
+    """Build the overall summary payload (computed once in load_data)"""
+    n = len(daily_df)
     return {
         "success": True,
         "date_range": {
-            "start": daily_df['date'].min().strftime('%Y-%m-%d'),
-            "end": daily_df['date'].max().strftime('%Y-%m-%d'),
-            "total_days": len(daily_df)
+            "start": _date_labels[0],
+            "end": _date_labels[-1],
+            "total_days": n
         },
         "totals": {
-            "revenue": round(daily_df['daily_revenue'].sum(), 2),
-            "orders": int(daily_df['orders'].sum()),
-            "sales_units": int(daily_df['sales_units'].sum()),
-            "new_customers": int(daily_df['new_customers'].sum()),
-            "churned_customers": int(daily_df['churned_customers'].sum())
+            "revenue": round(_range_sum('daily_revenue', 0, n), 2),
+            "orders": int(_range_sum('orders', 0, n)),
+            "sales_units": int(_range_sum('sales_units', 0, n)),
+            "new_customers": int(_range_sum('new_customers', 0, n)),
+            "churned_customers": int(_range_sum('churned_customers', 0, n))
         },
         "averages": {
-            "daily_revenue": round(daily_df['daily_revenue'].mean(), 2),
-            "daily_orders": round(daily_df['orders'].mean(), 2),
-            "active_customers": int(daily_df['active_customers'].mean()),
-            "churn_rate": round(daily_df['churn_rate'].mean(), 2)
+            "daily_revenue": round(_range_mean('daily_revenue', 0, n), 2),
+            "daily_orders": round(_range_mean('orders', 0, n), 2),
+            "active_customers": int(_range_mean('active_customers', 0, n)),
+            "churn_rate": round(_range_mean('churn_rate', 0, n), 2)
         }
     }
 
+@app.get("/api/metrics/summary")
+async def get_summary(
+    current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
+):
+    """Get overall summary statistics"""
+    if daily_df is None:
+        raise HTTPException(status_code=500, detail="Data not loaded")
+    
+    # The data is fixed after startup, so the body is served verbatim
+    return Response(_summary_bytes, media_type="application/json")
+
 # ============================================
 # FORECASTING ENDPOINTS
 # ============================================
 
 forecast_router = APIRouter(prefix="/api/forecast", tags=["Forecasting"])
 
-@forecast_router.get("/revenue")
-async def forecast_revenue(
-    periods: int = Query(30, description="Number of days to forecast"),
-    current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
-):
-    """Forecast future revenue"""
-    try:
-        if daily_df is None:
-            raise HTTPException(status_code=500, detail="Daily data not loaded")
-        if forecaster is None:
-            raise HTTPException(status_code=500, detail="Forecaster not available")
-        forecast_data = forecaster.forecast_revenue(daily_df, periods)
-        return {"success": True, "metric": "daily_revenue", "forecast": forecast_data}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+# Fits can take seconds, so handlers call these through _coalesced, which runs
+# them in the threadpool and lets concurrent identical requests share one fit
+@lru_cache(maxsize=64)
+def _cached_forecast(method: str, periods: int) -> dict:
+    """Run a forecaster method on daily_df (cached until data reload)"""
+    return getattr(forecaster, method)(daily_df, periods)
 
-@forecast_router.get("/orders")
-async def forecast_orders(
-    periods: int = Query(30),
-    current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
-):
-    """Forecast future orders"""
-    try:
-        if daily_df is None:
-            raise HTTPException(status_code=500, detail="Daily data not loaded")
-        if forecaster is None:
-            raise HTTPException(status_code=500, detail="Forecaster not available")
-        forecast_data = forecaster.forecast_orders(daily_df, periods)
-        return {"success": True, "metric": "orders", "forecast": forecast_data}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@lru_cache(maxsize=64)
+def _cached_backtest(metric: str, test_days: int) -> dict:
+    """Backtest a metric on daily_df (cached until data reload)"""
+    return forecaster.backtest_forecast(daily_df, metric=metric, test_days=test_days)
 
-@forecast_router.get("/customers")
-async def forecast_customers(
-    periods: int = Query(30),
-    current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
-):
-    """Forecast active customers"""
-    try:
-        if daily_df is None:
-            raise HTTPException(status_code=500, detail="Daily data not loaded")
-        if forecaster is None:
-            raise HTTPException(status_code=500, detail="Forecaster not available")
-        forecast_data = forecaster.forecast_customers(daily_df, periods)
-        return {"success": True, "metric": "active_customers", "forecast": forecast_data}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+# (helper name, args) -> task running that call in the threadpool
+_inflight = {}
+
+def _forget_inflight(key, task):
+    """Drop a finished run from _inflight; retrieve its error so it is never logged as unhandled"""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()
 
-@forecast_router.get("/churn")
-async def forecast_churn(
-    periods: int = Query(30),
+async def _coalesced(fn, *args):
+    """Run fn(*args) in the threadpool, sharing one run between identical concurrent calls"""
+    key = (fn.__name__, args)
+    task = _inflight.get(key)
+    if task is None:
+        # The run is its own task rather than part of the first caller's request,
+        # so every caller (first one included) just waits on it
+        task = asyncio.ensure_future(run_in_threadpool(fn, *args))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _forget_inflight(key, done))
+    # Shielded so a disconnecting caller cancels only its own wait, not the shared run
+    return await asyncio.shield(task)
+
+@forecast_router.get("/all")
+async def forecast_all(
+    periods: int = Query(30, ge=1),
     current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
 ):
-    """Forecast churn rate"""
+    """Comprehensive forecast for all key metrics"""
     try:
         if daily_df is None:
             raise HTTPException(status_code=500, detail="Daily data not loaded")
         if forecaster is None:
             raise HTTPException(status_code=500, detail="Forecaster not available")
-        forecast_data = forecaster.forecast_churn_rate(daily_df, periods)
-        return {"success": True, "metric": "churn_rate", "forecast": forecast_data}
+        result = await _coalesced(_cached_forecast, 'get_forecast_summary', periods)
+        return ORJSONResponse({"success": True, "forecasts": result})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@forecast_router.get("/all")
-async def forecast_all(
-    periods: int = Query(30),
+@forecast_router.get("/accuracy")
+async def forecast_accuracy(
+    metric: str = Query("daily_revenue"),
+    test_days: int = Query(14, ge=1),
     current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
 ):
-    """Comprehensive forecast for all key metrics"""
+    """Calculate forecast accuracy using recent data"""
     try:
         if daily_df is None:
             raise HTTPException(status_code=500, detail="Daily data not loaded")
         if forecaster is None:
             raise HTTPException(status_code=500, detail="Forecaster not available")
-        result = forecaster.get_forecast_summary(daily_df, periods)
-        return {"success": True, "forecasts": result}
+        result = await _coalesced(_cached_backtest, metric, test_days)
+        return ORJSONResponse({"success": True, "metric": metric, "accuracy": result})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@forecast_router.get("/accuracy")
-async def forecast_accuracy(
-    metric: str = Query("daily_revenue"),
-    test_days: int = Query(14),
+# URL name -> (metric reported in the response, forecaster method)
+FORECAST_METRICS = {
+    "revenue": ("daily_revenue", "forecast_revenue"),
+    "orders": ("orders", "forecast_orders"),
+    "customers": ("active_customers", "forecast_customers"),
+    "churn": ("churn_rate", "forecast_churn_rate"),
+}
+
+# Registered after /all and /accuracy so those fixed paths match first
+@forecast_router.get("/{metric}")
+async def forecast_single_metric(
+    metric: Literal["revenue", "orders", "customers", "churn"],
+    periods: int = Query(30, ge=1, description="Number of days to forecast"),
     current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
 ):
-    """Calculate forecast accuracy using recent data"""
+    """Forecast revenue, orders, active customers or churn rate"""
     try:
         if daily_df is None:
             raise HTTPException(status_code=500, detail="Daily data not loaded")
         if forecaster is None:
             raise HTTPException(status_code=500, detail="Forecaster not available")
-        result = forecaster.backtest_forecast(daily_df, metric=metric, test_days=test_days)
-        return {"success": True, "metric": metric, "accuracy": result}
+        column, method = FORECAST_METRICS[metric]
+        forecast_data = await _coalesced(_cached_forecast, method, periods)
+        return ORJSONResponse({"success": True, "metric": column, "forecast": forecast_data})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -440,9 +581,19 @@ app.include_router(forecast_router)
 # EXPORT ENDPOINTS
 # ============================================
 
+# Reports up to this size stay in memory; larger ones spill to a temp file
+PDF_SPOOL_MAX_BYTES = 1 << 20
+FILE_CHUNK_BYTES = 64 * 1024
+
+def iter_file(f, chunk_size=FILE_CHUNK_BYTES):
+    """Yield the rest of binary file `f` in chunks, closing it when done"""
+    with f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
 @app.get("/api/export/pdf")
 async def export_pdf(
-    days: int = Query(30, description="Number of days to include in report"),
+    days: int = Query(30, ge=1, description="Number of days to include in report"),
     current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
 ):
     """
@@ -454,80 +605,35 @@ async def export_pdf(
         if pdf_generator is None:
             raise HTTPException(status_code=500, detail="PDF generator not available")
         
-        # Get data
-        current_data = daily_df.tail(days)
-        previous_data = daily_df.tail(days * 2).head(days)
-        
-        # Calculate KPIs
-        def calculate_change(current, previous):
-            if previous == 0:
-                return 0
-            return ((current - previous) / previous) * 100
-        
-        kpis = {
-            'total_revenue': {
-                'value': current_data['daily_revenue'].sum(),
-                'change_percent': calculate_change(
-                    current_data['daily_revenue'].sum(),
-                    previous_data['daily_revenue'].sum()
-                ),
-                'previous_value': previous_data['daily_revenue'].sum()
-            },
-            'total_orders': {
-                'value': int(current_data['orders'].sum()),
-                'change_percent': calculate_change(
-                    current_data['orders'].sum(),
-                    previous_data['orders'].sum()
-                ),
-                'previous_value': int(previous_data['orders'].sum())
-            },
-            'active_customers': {
-                'value': int(current_data['active_customers'].mean()),
-                'change_percent': calculate_change(
-                    current_data['active_customers'].mean(),
-                    previous_data['active_customers'].mean()
-                ),
-                'previous_value': int(previous_data['active_customers'].mean())
-            },
-            'avg_order_value': {
-                'value': current_data['avg_order_value'].mean(),
-                'change_percent': calculate_change(
-                    current_data['avg_order_value'].mean(),
-                    previous_data['avg_order_value'].mean()
-                ),
-                'previous_value': previous_data['avg_order_value'].mean()
-            },
-            'churn_rate': {
-                'value': current_data['churn_rate'].mean(),
-                'change_percent': calculate_change(
-                    current_data['churn_rate'].mean(),
-                    previous_data['churn_rate'].mean()
-                ),
-                'previous_value': previous_data['churn_rate'].mean()
-            }
-        }
-        
-        # Get daily metrics as list
-        daily_metrics = current_data.to_dict('records')
+        # KPIs come from the same windows as /api/metrics/kpis
+        kpis = _kpi_values(days)
+        current_data = daily_df.iloc[max(len(daily_df) - days, 0):]
         
         # Get forecast summary if available
         forecast_summary = None
         if forecaster:
-            forecast_data = forecaster.get_forecast_summary(daily_df, periods=30)
+            forecast_data = await _coalesced(_cached_forecast, 'get_forecast_summary', 30)
             forecast_summary = forecast_data['summary']
         
-        # Generate PDF
-        pdf_buffer = pdf_generator.generate_report(
-            kpis=kpis,
-            daily_metrics=daily_metrics,
-            forecast_summary=forecast_summary,
-            period_days=days
-        )
+        # Generate PDF; iter_file owns (and closes) the spool only once it succeeds
+        spool = SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES)
+        try:
+            pdf_buffer = await run_in_threadpool(
+                pdf_generator.generate_report,
+                kpis=kpis,
+                daily_metrics=current_data,
+                forecast_summary=forecast_summary,
+                period_days=days,
+                sink=spool
+            )
+        except BaseException:
+            spool.close()  # Drops the temp file if the report had spilled to disk
+            raise
         
         # Return as downloadable file
         filename = f"dashboard_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         return StreamingResponse(
-            pdf_buffer,
+            iter_file(pdf_buffer),
             media_type="application/pdf",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
@@ -535,9 +641,17 @@ async def export_pdf(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF generation error: {str(e)}")
 
+CSV_CHUNK_ROWS = 1024
+
+def iter_csv(df, chunk_rows=CSV_CHUNK_ROWS):
+    """Yield `df` as CSV bytes: the header, then `chunk_rows` rows at a time"""
+    yield df.head(0).to_csv(index=False).encode()
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=False).encode()
+
 @app.get("/api/export/csv")
 async def export_csv(
-    days: int = Query(30, description="Number of days to export"),
+    days: int = Query(30, ge=1, description="Number of days to export"),
     current_user: User = Depends(get_current_active_user) if AUTH_ENABLED else None
 ):
     """
@@ -547,19 +661,14 @@ async def export_csv(
         if daily_df is None:
             raise HTTPException(status_code=500, detail="Data not loaded")
         
-        # Get data
-        export_data = daily_df.tail(days).copy()
-        export_data['date'] = export_data['date'].dt.strftime('%Y-%m-%d')
-        
-        # Convert to CSV
-        csv_buffer = BytesIO()
-        export_data.to_csv(csv_buffer, index=False)
-        csv_buffer.seek(0)
+        # Get data as a positional slice with the date labels formatted at load
+        lo = max(len(daily_df) - days, 0)
+        export_data = daily_df.iloc[lo:].assign(date=_date_labels[lo:])
         
-        # Return as downloadable file
+        # Return as downloadable file, streamed in row chunks instead of one buffer
         filename = f"dashboard_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         return StreamingResponse(
-            csv_buffer,
+            iter_csv(export_data),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
@@ -580,4 +689,13 @@ if __name__ == "__main__":
         print("   Admin: admin / admin123")
         print("   Demo:  demo / demo123")
     print("="*60)
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Import-string form so uvicorn can fork workers; each worker re-imports this module.
+    # uvloop isn't available on Windows, where uvicorn falls back to asyncio.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    )
\ No newline at end of file
@@ -1,15 +1,67 @@
 import pandas as pd
 import numpy as np
 from prophet import Prophet
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import hashlib
+import os
+import threading
 import warnings
 warnings.filterwarnings('ignore')
 
+# The Stan fits run in cmdstan subprocesses, so the four summary metrics fit in parallel
+_FORECAST_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="forecast")
+
+# Fitted models kept per forecaster (least recently used evicted first)
+MODEL_CACHE_SIZE = 8
+
+# Churn is volatile, so it is forecast from recent history only
+CHURN_HISTORY_DAYS = 90
+
+def _clamp_int(arr, lo=0, hi=None):
+    """Clip to [lo, hi] and truncate toward zero, like max(lo, int(x)) per element"""
+    return np.clip(arr, lo, hi).astype(np.int64)
+
+def _as_datetime(dates):
+    """Return a date Series as datetime64, skipping the parse when it already is"""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    return pd.to_datetime(dates)
+
 class BusinessForecaster:
-    """ML Forecasting service using Facebook Prophet"""
+    """ML Forecasting service using Facebook Prophet (or STL + ARIMA)"""
     
-    def __init__(self):
-        self.models = {}
+    def __init__(self, backend=None):
+        # 'prophet' (default) or 'stl', which trades Prophet's Stan fit for a fast statsmodels one
+        self.backend = backend or os.getenv("FORECAST_BACKEND", "prophet")
+        # Fitted models keyed by (value_col, Prophet params, data fingerprint)
+        self.models = OrderedDict()
+        self._models_lock = threading.Lock()
+    
+    def fingerprint(self, df, date_col, value_col):
+        """Content hash of the series a model would be fitted on"""
+        row_hashes = pd.util.hash_pandas_object(df[[date_col, value_col]], index=False)
+        return hashlib.blake2b(row_hashes.values).hexdigest()
+    
+    def _fit_model(self, df, date_col, value_col, **params):
+        """Fit Prophet(**params) on df, reusing a cached fit of identical data and params"""
+        key = (value_col, tuple(sorted(params.items())), self.fingerprint(df, date_col, value_col))
+        
+        with self._models_lock:
+            model = self.models.get(key)
+            if model is not None:
+                self.models.move_to_end(key)
+                return model
+        
+        model = Prophet(**params)
+        model.fit(self.prepare_data(df, date_col, value_col))
+        
+        with self._models_lock:
+            self.models[key] = model
+            if len(self.models) > MODEL_CACHE_SIZE:
+                self.models.popitem(last=False)
+        return model
     
     def prepare_data(self, df, date_col, value_col):
         """
@@ -24,12 +76,22 @@ class BusinessForecaster:
             DataFrame with 'ds' and 'y' columns
         """
         prophet_df = pd.DataFrame({
-            'ds': pd.to_datetime(df[date_col]),
-            'y': df[value_col]
+            'ds': _as_datetime(df[date_col]).to_numpy(),
+            'y': df[value_col].to_numpy()
         })
         return prophet_df
     
-    def forecast_metric(self, df, date_col, value_col, periods=30, freq='D'):
+    def make_future(self, df, date_col, periods, freq='D'):
+        """
+        Build the forecast horizon: the `periods` dates after the last date in df
+        
+        Same dates as Prophet's make_future_dataframe, without the history rows
+        """
+        last_date = _as_datetime(df[date_col]).max()
+        dates = pd.date_range(start=last_date, periods=periods + 1, freq=freq)
+        return pd.DataFrame({'ds': dates[dates > last_date][:periods]})
+    
+    def forecast_metric(self, df, date_col, value_col, periods=30, freq='D', future=None):
         """
         Forecast a single metric
         
@@ -39,108 +101,160 @@ class BusinessForecaster:
             value_col: Value column to forecast
             periods: Number of periods to forecast
             freq: Frequency ('D' for daily, 'W' for weekly)
+            future: Optional horizon from make_future, shared between metrics
         
         Returns:
-            Dictionary with forecast data
+            Dictionary with forecast dates (list) and numpy value arrays
         """
-        # Prepare data
-        prophet_df = self.prepare_data(df, date_col, value_col)
-        
-        # Initialize and train model
-        model = Prophet(
-            daily_seasonality=True if freq == 'D' else False,
-            weekly_seasonality=True,
-            yearly_seasonality=True,
-            changepoint_prior_scale=0.05,  # Flexibility of trend changes
-            seasonality_prior_scale=10.0    # Flexibility of seasonality
-        )
+        if future is None:
+            future = self.make_future(df, date_col, periods, freq)
         
-        model.fit(prophet_df)
-        
-        # Create future dataframe
-        future = model.make_future_dataframe(periods=periods, freq=freq)
-        
-        # Make predictions
-        forecast = model.predict(future)
+        if self.backend == 'stl':
+            forecast = self._forecast_stl(df, value_col, future, freq)
+        else:
+            forecast = self._forecast_prophet(df, date_col, value_col, future, freq)
         
         # Extract relevant columns
-        result = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(periods)
+        result = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
         
         # Calculate confidence interval width (uncertainty metric)
         result['uncertainty'] = result['yhat_upper'] - result['yhat_lower']
         
         return {
             'dates': result['ds'].dt.strftime('%Y-%m-%d').tolist(),
-            'predictions': result['yhat'].round(2).tolist(),
-            'lower_bound': result['yhat_lower'].round(2).tolist(),
-            'upper_bound': result['yhat_upper'].round(2).tolist(),
-            'uncertainty': result['uncertainty'].round(2).tolist()
+            'predictions': result['yhat'].round(2).to_numpy(),
+            'lower_bound': result['yhat_lower'].round(2).to_numpy(),
+            'upper_bound': result['yhat_upper'].round(2).to_numpy(),
+            'uncertainty': result['uncertainty'].round(2).to_numpy()
         }
     
-    def forecast_revenue(self, daily_df, periods=30):
+    def _prophet_params(self, freq):
+        """Prophet settings used for the dashboard forecasts"""
+        return dict(
+            daily_seasonality=True if freq == 'D' else False,
+            weekly_seasonality=True,
+            yearly_seasonality=True,
+            changepoint_prior_scale=0.05,  # Flexibility of trend changes
+            seasonality_prior_scale=10.0    # Flexibility of seasonality
+        )
+    
+    def _forecast_prophet(self, df, date_col, value_col, future, freq):
+        """Fit (or reuse) a Prophet model and predict the `future` dates"""
+        model = self._fit_model(df, date_col, value_col, **self._prophet_params(freq))
+        return model.predict(future)
+    
+    def _forecast_stl(self, df, value_col, future, freq):
+        """STL-decomposed ARIMA(1,1,1) forecast for the `future` dates"""
+        # Imported on first use so the default Prophet path skips statsmodels' import cost
+        from statsmodels.tsa.arima.model import ARIMA
+        from statsmodels.tsa.forecasting.stl import STLForecast
+        
+        y = df[value_col].to_numpy(dtype=float)
+        periods = len(future)
+        fitted = STLForecast(
+            y, ARIMA,
+            model_kwargs=dict(order=(1, 1, 1)),
+            period=7 if freq == 'D' else 52
+        ).fit()
+        prediction = fitted.get_prediction(start=len(y), end=len(y) + periods - 1)
+        
+        # 80% interval, matching Prophet's default interval_width
+        lower, upper = prediction.conf_int(alpha=0.2).T
+        
+        return pd.DataFrame({
+            'ds': future['ds'].to_numpy(),
+            'yhat': prediction.predicted_mean,
+            'yhat_lower': lower,
+            'yhat_upper': upper
+        })
+    
+    def forecast_revenue(self, daily_df, periods=30, future=None):
         """Forecast daily revenue"""
         return self.forecast_metric(
             df=daily_df,
             date_col='date',
             value_col='daily_revenue',
             periods=periods,
-            freq='D'
+            freq='D',
+            future=future
         )
     
-    def forecast_orders(self, daily_df, periods=30):
+    def forecast_orders(self, daily_df, periods=30, future=None):
         """Forecast daily orders"""
         forecast = self.forecast_metric(
             df=daily_df,
             date_col='date',
             value_col='orders',
             periods=periods,
-            freq='D'
+            freq='D',
+            future=future
         )
         
         # Ensure orders are positive integers
-        forecast['predictions'] = [max(0, int(x)) for x in forecast['predictions']]
-        forecast['lower_bound'] = [max(0, int(x)) for x in forecast['lower_bound']]
-        forecast['upper_bound'] = [max(0, int(x)) for x in forecast['upper_bound']]
+        forecast['predictions'] = _clamp_int(forecast['predictions'])
+        forecast['lower_bound'] = _clamp_int(forecast['lower_bound'])
+        forecast['upper_bound'] = _clamp_int(forecast['upper_bound'])
         
         return forecast
     
-    def forecast_customers(self, daily_df, periods=30):
+    def forecast_customers(self, daily_df, periods=30, future=None):
         """Forecast active customers"""
         forecast = self.forecast_metric(
             df=daily_df,
             date_col='date',
             value_col='active_customers',
             periods=periods,
-            freq='D'
+            freq='D',
+            future=future
         )
         
         # Ensure customers are positive integers
-        forecast['predictions'] = [max(0, int(x)) for x in forecast['predictions']]
-        forecast['lower_bound'] = [max(0, int(x)) for x in forecast['lower_bound']]
-        forecast['upper_bound'] = [max(0, int(x)) for x in forecast['upper_bound']]
+        forecast['predictions'] = _clamp_int(forecast['predictions'])
+        forecast['lower_bound'] = _clamp_int(forecast['lower_bound'])
+        forecast['upper_bound'] = _clamp_int(forecast['upper_bound'])
         
         return forecast
     
-    def forecast_churn_rate(self, daily_df, periods=30):
+    def forecast_churn_rate(self, daily_df, periods=30, future=None):
         """Forecast churn rate"""
         # Only use recent data for churn (last 90 days) as it's more volatile
-        recent_df = daily_df.tail(90)
+        recent_df = daily_df.tail(CHURN_HISTORY_DAYS)
         
         forecast = self.forecast_metric(
             df=recent_df,
             date_col='date',
             value_col='churn_rate',
             periods=periods,
-            freq='D'
+            freq='D',
+            future=future
         )
         
         # Ensure churn rate is between 0 and 100
-        forecast['predictions'] = [max(0, min(100, x)) for x in forecast['predictions']]
-        forecast['lower_bound'] = [max(0, min(100, x)) for x in forecast['lower_bound']]
-        forecast['upper_bound'] = [max(0, min(100, x)) for x in forecast['upper_bound']]
+        forecast['predictions'] = np.clip(forecast['predictions'], 0, 100)
+        forecast['lower_bound'] = np.clip(forecast['lower_bound'], 0, 100)
+        forecast['upper_bound'] = np.clip(forecast['upper_bound'], 0, 100)
         
         return forecast
     
+    def warm(self, daily_df):
+        """Fit the models behind the summary forecasts ahead of the first request"""
+        if self.backend == 'stl':
+            return  # Nothing to pre-fit; STL fits per call in milliseconds
+        
+        params = self._prophet_params('D')
+        series = [
+            (daily_df, 'daily_revenue'),
+            (daily_df, 'orders'),
+            (daily_df, 'active_customers'),
+            (daily_df.tail(CHURN_HISTORY_DAYS), 'churn_rate')
+        ]
+        futures = [
+            _FORECAST_EXECUTOR.submit(self._fit_model, df, 'date', value_col, **params)
+            for df, value_col in series
+        ]
+        for f in futures:
+            f.result()
+    
     def get_forecast_summary(self, daily_df, periods=30):
         """
         Get comprehensive forecast summary for all metrics
@@ -150,14 +264,25 @@ class BusinessForecaster:
         """
         print(f"📊 Generating {periods}-day forecast...")
         
-        revenue_forecast = self.forecast_revenue(daily_df, periods)
-        orders_forecast = self.forecast_orders(daily_df, periods)
-        customers_forecast = self.forecast_customers(daily_df, periods)
-        churn_forecast = self.forecast_churn_rate(daily_df, periods)
+        # All four series end on the same day, so they share one horizon frame
+        future = self.make_future(daily_df, 'date', periods)
+        
+        futures = [
+            _FORECAST_EXECUTOR.submit(fn, daily_df, periods, future)
+            for fn in (
+                self.forecast_revenue,
+                self.forecast_orders,
+                self.forecast_customers,
+                self.forecast_churn_rate
+            )
+        ]
+        revenue_forecast, orders_forecast, customers_forecast, churn_forecast = (
+            f.result() for f in futures
+        )
         
         # Calculate summary statistics
-        total_forecasted_revenue = sum(revenue_forecast['predictions'])
-        total_forecasted_orders = sum(orders_forecast['predictions'])
+        total_forecasted_revenue = revenue_forecast['predictions'].sum()
+        total_forecasted_orders = orders_forecast['predictions'].sum()
         avg_forecasted_customers = np.mean(customers_forecast['predictions'])
         avg_forecasted_churn = np.mean(churn_forecast['predictions'])
         
@@ -182,17 +307,22 @@ class BusinessForecaster:
         Returns:
             MAPE (Mean Absolute Percentage Error) and RMSE
         """
-        actual = np.array(actual)
-        predicted = np.array(predicted)
+        actual = np.asarray(actual, dtype=float)
+        predicted = np.asarray(predicted, dtype=float)
         
-        # MAPE
-        mape = np.mean(np.abs((actual - predicted) / actual)) * 100
+        # One error pass shared by all three metrics
+        err = actual - predicted
+        abs_err = np.abs(err)
+        
+        # MAPE (days with zero actuals are skipped rather than dividing by zero)
+        nonzero = actual != 0
+        mape = np.mean(abs_err[nonzero] / np.abs(actual[nonzero])) * 100 if nonzero.any() else 0.0
         
         # RMSE
-        rmse = np.sqrt(np.mean((actual - predicted) ** 2))
+        rmse = np.sqrt(np.mean(err * err))
         
         # MAE
-        mae = np.mean(np.abs(actual - predicted))
+        mae = np.mean(abs_err)
         
         return {
             'mape': round(mape, 2),
@@ -216,28 +346,27 @@ class BusinessForecaster:
         train_df = daily_df[:-test_days]
         test_df = daily_df[-test_days:]
         
-        # Make forecast
-        prophet_df = self.prepare_data(train_df, 'date', metric)
-        
-        model = Prophet(daily_seasonality=True, weekly_seasonality=True)
-        model.fit(prophet_df)
-        
-        future = model.make_future_dataframe(periods=test_days, freq='D')
-        forecast = model.predict(future)
-        
-        # Get predictions for test period
-        predictions = forecast['yhat'].tail(test_days).values
-        actuals = test_df[metric].values
+        # Get predictions for test period (only the held-out dates are predicted),
+        # from the same backend that serves the forecasts
+        future = self.make_future(train_df, 'date', test_days)
+        if self.backend == 'stl':
+            forecast = self._forecast_stl(train_df, metric, future, 'D')
+        else:
+            model = self._fit_model(train_df, 'date', metric, daily_seasonality=True, weekly_seasonality=True)
+            forecast = model.predict(future)
+        predictions = forecast['yhat'].to_numpy()
+        actuals = test_df[metric].to_numpy()
         
         # Calculate metrics
         accuracy = self.calculate_accuracy_metrics(actuals, predictions)
         
+        # Arrays are serialized directly by ORJSONResponse
         return {
             'metric': metric,
             'test_days': test_days,
             'accuracy': accuracy,
-            'actual_values': actuals.tolist(),
-            'predicted_values': predictions.tolist()
+            'actual_values': np.round(actuals, 2),
+            'predicted_values': np.round(predictions, 2)
         }
 
 # Create global instance
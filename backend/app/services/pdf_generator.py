@@ -29,21 +29,61 @@ class DashboardPDFGenerator:
             spaceAfter=12,
             spaceBefore=12
         )
+        
+        # Table styles are the same for every report, so build them once
+        self.kpi_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+        ])
+        self.daily_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+        ])
+        self.forecast_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ])
     
-    def generate_report(self, kpis, daily_metrics, forecast_summary, period_days=30):
+    def generate_report(self, kpis, daily_metrics, forecast_summary, period_days=30, sink=None):
         """
         Generate comprehensive PDF report
         
         Args:
             kpis: KPI data dictionary
-            daily_metrics: List of daily metrics
+            daily_metrics: DataFrame (or list of records) of daily metrics
             forecast_summary: Forecast data dictionary
             period_days: Number of days in the report
+            sink: Optional binary file to write into (a new BytesIO by default)
         
         Returns:
-            BytesIO buffer containing PDF
+            The buffer containing the PDF, rewound to the start
         """
-        buffer = BytesIO()
+        buffer = sink if sink is not None else BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch)
         story = []
         
@@ -98,50 +138,27 @@ class DashboardPDFGenerator:
         ]
         
         kpi_table = Table(kpi_data, colWidths=[2*inch, 1.5*inch, 1*inch, 1.5*inch])
-        kpi_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-        ]))
+        kpi_table.setStyle(self.kpi_table_style)
         story.append(kpi_table)
         story.append(Spacer(1, 0.3*inch))
         
         # Recent Performance Section
         story.append(Paragraph("Recent Daily Performance (Last 7 Days)", self.heading_style))
         
-        recent_data = daily_metrics[-7:]
+        # Format each column in one pass, then take the rows as lists
+        recent_data = pd.DataFrame(daily_metrics[-7:]).assign(
+            daily_revenue=lambda d: d['daily_revenue'].map('${:,.0f}'.format),
+            orders=lambda d: d['orders'].astype(str),
+            active_customers=lambda d: d['active_customers'].astype(str),
+            churn_rate=lambda d: d['churn_rate'].map('{:.2f}%'.format)
+        )
         daily_table_data = [['Date', 'Revenue', 'Orders', 'Customers', 'Churn %']]
-        
-        for day in recent_data:
-            daily_table_data.append([
-                day['date'],
-                f"${day['daily_revenue']:,.0f}",
-                str(day['orders']),
-                str(day['active_customers']),
-                f"{day['churn_rate']:.2f}%"
-            ])
+        daily_table_data += recent_data[
+            ['date', 'daily_revenue', 'orders', 'active_customers', 'churn_rate']
+        ].values.tolist()
         
         daily_table = Table(daily_table_data, colWidths=[1.2*inch, 1.3*inch, 1*inch, 1.2*inch, 1*inch])
-        daily_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-        ]))
+        daily_table.setStyle(self.daily_table_style)
         story.append(daily_table)
         story.append(Spacer(1, 0.3*inch))
         
@@ -161,18 +178,7 @@ class DashboardPDFGenerator:
             ]
             
             forecast_table = Table(forecast_data, colWidths=[3*inch, 3*inch])
-            forecast_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ]))
+            forecast_table.setStyle(self.forecast_table_style)
             story.append(forecast_table)
         
         # Footer
@@ -0,0 +1,32 @@
+"""
+Convert the metrics CSVs to Parquet
+generate_sample_data.py already writes both; run this for CSVs from elsewhere.
+The API loads a Parquet copy only while it is at least as new as its CSV
+"""
+
+import os
+import pandas as pd
+
+DATA_DIR = "app/data"
+
+# Table name -> (date column to store as datetime64, column dtypes);
+# the dtypes match what read_metrics in app/main.py applies to the CSV
+TABLES = {
+    "daily_metrics": ("date", {"orders": "int32", "active_customers": "int32"}),
+    "weekly_metrics": ("week", None),
+}
+
+def convert_table(name, date_col, dtype=None):
+    """Convert one CSV table to Parquet with typed columns"""
+    csv_path = os.path.join(DATA_DIR, f"{name}.csv")
+    parquet_path = os.path.join(DATA_DIR, f"{name}.parquet")
+    
+    df = pd.read_csv(csv_path, parse_dates=[date_col], dtype=dtype)
+    df.to_parquet(parquet_path, engine="pyarrow", index=False)
+    print(f"📁 {csv_path} -> {parquet_path} ({len(df)} rows)")
+
+if __name__ == "__main__":
+    print("🔄 Converting CSV data to Parquet...")
+    for name, (date_col, dtype) in TABLES.items():
+        convert_table(name, date_col, dtype)
+    print("✅ Conversion complete!")
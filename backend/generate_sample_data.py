@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import random
 
 def generate_business_data(days=365):
     """
@@ -10,8 +10,12 @@ def generate_business_data(days=365):
     """
     
     # Set seed for reproducibility
-    np.random.seed(42)
-    random.seed(42)
+    rng = np.random.default_rng(42)
+    
+    # Draw all float noise up front in two batched float32 calls; rows are
+    # scaled to each range below (Generator.normal/uniform take no dtype)
+    normal = rng.standard_normal((2, days), dtype=np.float32)
+    uniform = rng.random((3, days), dtype=np.float32)
     
     # Generate date range
     end_date = datetime.now()
@@ -23,76 +27,84 @@ def generate_business_data(days=365):
     customer_growth = np.linspace(0, 500, days)  # Growing customer base
     
     # Seasonal patterns (weekends lower, holidays higher)
-    day_of_week = np.array([d.weekday() for d in dates])
-    weekend_effect = np.where((day_of_week == 5) | (day_of_week == 6), 0.7, 1.0)
+    day_of_week = dates.weekday.to_numpy()
+    weekend_effect = 1.0 - 0.3 * (day_of_week >= 5)
     
     # Monthly seasonality (end of month spikes)
-    day_of_month = np.array([d.day for d in dates])
-    month_end_effect = np.where(day_of_month >= 25, 1.3, 1.0)
+    day_of_month = dates.day.to_numpy()
+    month_end_effect = 1.0 + 0.3 * (day_of_month >= 25)
     
     # Holiday spikes (simplified)
-    month = np.array([d.month for d in dates])
-    holiday_effect = np.where((month == 11) | (month == 12), 1.4, 1.0)
+    month = dates.month.to_numpy()
+    holiday_effect = 1.0 + 0.4 * (month >= 11)
     
     # Generate CUSTOMERS
     active_customers = (base_customers + customer_growth + 
-                       np.random.normal(0, 30, days)).astype(int)
+                       30 * normal[0]).astype(int)
     active_customers = np.maximum(active_customers, 800)  # Floor at 800
     
     # Generate ORDERS (influenced by seasonality)
     base_orders = 50
-    orders = (base_orders * weekend_effect * month_end_effect * holiday_effect + 
-              np.random.normal(0, 10, days))
-    orders = np.maximum(orders.astype(int), 10)  # At least 10 orders/day
+    # Apply the seasonal effects in place in one buffer instead of a temporary per factor
+    orders = np.multiply(weekend_effect, base_orders)
+    np.multiply(orders, month_end_effect, out=orders)
+    np.multiply(orders, holiday_effect, out=orders)
+    orders += 10 * normal[1]
+    orders = np.rint(orders).astype(np.int32)
+    np.maximum(orders, 10, out=orders)  # At least 10 orders/day
     
     # Generate REVENUE per order (avg $75-$125)
-    avg_order_value = np.random.uniform(75, 125, days)
+    avg_order_value = 75 + 50 * uniform[0]
     daily_revenue = orders * avg_order_value
     
     # Generate SALES UNITS (items sold)
-    items_per_order = np.random.uniform(1.5, 3.5, days)
-    sales_units = (orders * items_per_order).astype(int)
+    items_per_order = 1.5 + 2.0 * uniform[1]
+    sales_units = np.rint(orders * items_per_order).astype(np.int32)
     
     # Generate CHURN (2-5% monthly, varies by day)
-    daily_churn_rate = np.random.uniform(0.001, 0.003, days)  # 0.1-0.3% daily
-    churned_customers = (active_customers * daily_churn_rate).astype(int)
+    # Counts are rounded (not truncated), so the daily rate itself must stay
+    # in band: 0.07-0.17% daily is ~2-5% over a 30-day window
+    daily_churn_rate = 0.0007 + 0.001 * uniform[2]
+    churned_customers = np.rint(active_customers * daily_churn_rate).astype(np.int32)
     
     # Generate NEW CUSTOMERS (to sustain growth)
-    new_customers = churned_customers + np.random.randint(5, 20, days)
+    new_customers = churned_customers + rng.integers(5, 20, size=days, dtype=np.int32)
     
-    # Calculate CHURN RATE (rolling 30-day)
+    # Calculate CHURN RATE (rolling 30-day, over the 30 days before each day)
+    # Window sums are differences of prefix sums, so there is no per-day loop
     churn_rate_monthly = np.zeros(days)
-    for i in range(30, days):
-        window_churned = churned_customers[i-30:i].sum()
-        window_avg_customers = active_customers[i-30:i].mean()
-        churn_rate_monthly[i] = (window_churned / window_avg_customers) * 100
+    cs_churned = np.concatenate(([0], np.cumsum(churned_customers)))
+    cs_customers = np.concatenate(([0], np.cumsum(active_customers)))
+    window_churned = cs_churned[30:days] - cs_churned[:days-30]
+    window_avg_customers = (cs_customers[30:days] - cs_customers[:days-30]) / 30
+    churn_rate_monthly[30:] = (window_churned / window_avg_customers) * 100
     
     # Fill first 30 days with reasonable values
     churn_rate_monthly[:30] = np.linspace(3.0, churn_rate_monthly[30], 30)
     
-    # Create DataFrame
+    # Create DataFrame (float32 draws are widened back to float64 for output,
+    # counts are stored as int32 to match the dtypes the API loads them with)
     df = pd.DataFrame({
         'date': dates,
-        'daily_revenue': daily_revenue.round(2),
+        'daily_revenue': daily_revenue.astype(np.float64).round(2),
         'orders': orders,
         'sales_units': sales_units,
-        'active_customers': active_customers,
+        'active_customers': active_customers.astype(np.int32),
         'new_customers': new_customers,
         'churned_customers': churned_customers,
         'churn_rate': churn_rate_monthly.round(2),
-        'avg_order_value': avg_order_value.round(2),
+        'avg_order_value': avg_order_value.astype(np.float64).round(2),
         'day_of_week': day_of_week,
-        'is_weekend': (day_of_week >= 5).astype(int)
+        'is_weekend': day_of_week >= 5
     })
     
     return df
 
 def generate_weekly_aggregates(daily_df):
     """Aggregate daily data to weekly"""
-    weekly = daily_df.copy()
-    weekly['week'] = weekly['date'].dt.to_period('W').dt.start_time
-    
-    weekly_agg = weekly.groupby('week').agg({
+    # Monday-start weeks, grouped straight off the date column (no copy of the frame)
+    weeks = pd.Grouper(key='date', freq='W-MON', closed='left', label='left')
+    weekly_agg = daily_df.groupby(weeks).agg({
         'daily_revenue': 'sum',
         'orders': 'sum',
         'sales_units': 'sum',
@@ -107,43 +119,74 @@ def generate_weekly_aggregates(daily_df):
                           'avg_order_value']
     
     # Calculate weekly churn rate
-    weekly_agg['churn_rate'] = (
-        (weekly_agg['churned_customers'] / weekly_agg['avg_customers']) * 100
-    ).round(2)
+    churned = weekly_agg['churned_customers'].to_numpy()
+    customers = weekly_agg['avg_customers'].to_numpy()
+    weekly_agg['churn_rate'] = np.round(churned / customers * 100, 2)
     
     return weekly_agg
 
+SUMMARY_TEMPLATE = """
+============================================================
+📊 BUSINESS ANALYTICS DATA SUMMARY
+============================================================
+
+📅 Date Range: {date_start} to {date_end}
+📈 Total Days: {days}
+
+💰 REVENUE METRICS:
+   Total Revenue: ${daily_revenue_sum:,.2f}
+   Average Daily Revenue: ${daily_revenue_mean:,.2f}
+   Min Daily Revenue: ${daily_revenue_min:,.2f}
+   Max Daily Revenue: ${daily_revenue_max:,.2f}
+
+🛒 ORDER METRICS:
+   Total Orders: {orders_sum:,.0f}
+   Average Daily Orders: {orders_mean:.0f}
+   Average Order Value: ${avg_order_value_mean:.2f}
+
+👥 CUSTOMER METRICS:
+   Starting Customers: {customers_start:,}
+   Ending Customers: {customers_end:,}
+   Total New Customers: {new_customers_sum:,.0f}
+   Total Churned: {churned_customers_sum:,.0f}
+   Average Churn Rate: {churn_rate_mean:.2f}%
+
+📦 SALES UNITS:
+   Total Units Sold: {sales_units_sum:,.0f}
+   Average Daily Units: {sales_units_mean:.0f}
+
+============================================================"""
+
 def print_summary_stats(df):
     """Print summary statistics"""
-    print("\n" + "="*60)
-    print("📊 BUSINESS ANALYTICS DATA SUMMARY")
-    print("="*60)
-    print(f"\n📅 Date Range: {df['date'].min().date()} to {df['date'].max().date()}")
-    print(f"📈 Total Days: {len(df)}")
-    
-    print("\n💰 REVENUE METRICS:")
-    print(f"   Total Revenue: ${df['daily_revenue'].sum():,.2f}")
-    print(f"   Average Daily Revenue: ${df['daily_revenue'].mean():,.2f}")
-    print(f"   Min Daily Revenue: ${df['daily_revenue'].min():,.2f}")
-    print(f"   Max Daily Revenue: ${df['daily_revenue'].max():,.2f}")
-    
-    print("\n🛒 ORDER METRICS:")
-    print(f"   Total Orders: {df['orders'].sum():,}")
-    print(f"   Average Daily Orders: {df['orders'].mean():.0f}")
-    print(f"   Average Order Value: ${df['avg_order_value'].mean():.2f}")
-    
-    print("\n👥 CUSTOMER METRICS:")
-    print(f"   Starting Customers: {df['active_customers'].iloc[0]:,}")
-    print(f"   Ending Customers: {df['active_customers'].iloc[-1]:,}")
-    print(f"   Total New Customers: {df['new_customers'].sum():,}")
-    print(f"   Total Churned: {df['churned_customers'].sum():,}")
-    print(f"   Average Churn Rate: {df['churn_rate'].mean():.2f}%")
-    
-    print("\n📦 SALES UNITS:")
-    print(f"   Total Units Sold: {df['sales_units'].sum():,}")
-    print(f"   Average Daily Units: {df['sales_units'].mean():.0f}")
-    
-    print("\n" + "="*60)
+    # One agg call for every reduction, flattened to {column}_{func} keys
+    aggregated = df.agg({
+        'daily_revenue': ['sum', 'mean', 'min', 'max'],
+        'orders': ['sum', 'mean'],
+        'avg_order_value': ['mean'],
+        'new_customers': ['sum'],
+        'churned_customers': ['sum'],
+        'churn_rate': ['mean'],
+        'sales_units': ['sum', 'mean'],
+    })
+    stats = {
+        f"{col}_{func}": value
+        for col, values in aggregated.items()
+        for func, value in values.dropna().items()
+    }
+    print(SUMMARY_TEMPLATE.format(
+        date_start=df['date'].min().date(),
+        date_end=df['date'].max().date(),
+        days=len(df),
+        customers_start=df['active_customers'].iloc[0],
+        customers_end=df['active_customers'].iloc[-1],
+        **stats
+    ))
+
+def write_table(df, path_stem):
+    """Write one table as CSV, then as its Parquet copy"""
+    df.to_csv(f"{path_stem}.csv", index=False)
+    df.to_parquet(f"{path_stem}.parquet", engine="pyarrow", index=False)
 
 # Generate the data
 if __name__ == "__main__":
@@ -155,13 +198,24 @@ if __name__ == "__main__":
     # Generate weekly aggregates
     weekly_data = generate_weekly_aggregates(daily_data)
     
-    # Save to CSV
-    daily_data.to_csv('app/data/daily_metrics.csv', index=False)
-    weekly_data.to_csv('app/data/weekly_metrics.csv', index=False)
+    # Save to CSV, plus the typed Parquet copy the API prefers on load.
+    # Each table writes its CSV first, so its Parquet copy ends up at least as
+    # new and read_metrics does not treat it as stale. The two tables are
+    # independent, so they are written concurrently.
+    # is_weekend is written as 0/1 to both, so the API serves the same
+    # values whichever file it loads
+    daily_output = daily_data.astype({'is_weekend': int})
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        writes = [
+            pool.submit(write_table, daily_output, 'app/data/daily_metrics'),
+            pool.submit(write_table, weekly_data, 'app/data/weekly_metrics'),
+        ]
+        for write in writes:
+            write.result()  # Re-raise any write error
     
     print("✅ Data generated successfully!")
-    print(f"📁 Saved to: app/data/daily_metrics.csv")
-    print(f"📁 Saved to: app/data/weekly_metrics.csv")
+    print(f"📁 Saved to: app/data/daily_metrics.csv (+ .parquet)")
+    print(f"📁 Saved to: app/data/weekly_metrics.csv (+ .parquet)")
     
     # Print summary
     print_summary_stats(daily_data)
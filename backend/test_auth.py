@@ -8,11 +8,14 @@ import json
 
 API_BASE = "http://localhost:8000"
 
+# One keep-alive session so every request reuses the same connection
+SESSION = requests.Session()
+
 def test_login(username, password):
     """Test login endpoint"""
     print(f"\n🔐 Testing login for: {username}")
     
-    response = requests.post(
+    response = SESSION.post(
         f"{API_BASE}/api/auth/login",
         data={
             "username": username,
@@ -39,7 +42,7 @@ def test_protected_endpoint(token):
         "Authorization": f"Bearer {token}"
     }
     
-    response = requests.get(f"{API_BASE}/api/metrics/kpis", headers=headers)
+    response = SESSION.get(f"{API_BASE}/api/metrics/kpis", headers=headers)
     
     if response.status_code == 200:
         data = response.json()
@@ -58,7 +61,7 @@ def test_invalid_token():
         "Authorization": "Bearer invalid_token_here"
     }
     
-    response = requests.get(f"{API_BASE}/api/metrics/kpis", headers=headers)
+    response = SESSION.get(f"{API_BASE}/api/metrics/kpis", headers=headers)
     
     if response.status_code == 401:
         print(f"✅ Invalid token correctly rejected (401)")
@@ -91,7 +94,7 @@ def main():
     
     # Test 4: Invalid credentials
     print("\n🔐 Testing invalid credentials...")
-    bad_response = requests.post(
+    bad_response = SESSION.post(
         f"{API_BASE}/api/auth/login",
         data={"username": "wrong", "password": "wrong"}
     )
@@ -106,7 +109,7 @@ def main():
     # Test 6: Get current user
     print(f"\n👤 Testing /api/auth/me endpoint...")
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(f"{API_BASE}/api/auth/me", headers=headers)
+    response = SESSION.get(f"{API_BASE}/api/auth/me", headers=headers)
     if response.status_code == 200:
         user = response.json()
         print(f"✅ Current user retrieved: {user['full_name']}")
@@ -5,12 +5,36 @@ Run this to verify Prophet forecasting works correctly
 
 import requests
 import json
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from fastapi import APIRouter
 
 
 API_BASE = "http://localhost:8000"
 
+# One keep-alive session per thread: checks on the same thread reuse a
+# connection, and concurrent checks never share a Session (not thread-safe)
+_thread_state = threading.local()
+
+def get_session():
+    """Return the calling thread's requests.Session, creating it on first use"""
+    session = getattr(_thread_state, "session", None)
+    if session is None:
+        session = _thread_state.session = requests.Session()
+    return session
+
+# Independent forecast checks, fired concurrently so the server fits them in parallel
+FORECAST_CHECKS = {
+    "revenue": ("/api/forecast/revenue", {"periods": 30}),
+    "orders": ("/api/forecast/orders", {"periods": 30}),
+    "customers": ("/api/forecast/customers", {"periods": 30}),
+    "churn": ("/api/forecast/churn", {"periods": 30}),
+    "all": ("/api/forecast/all", {"periods": 30}),
+    "accuracy": ("/api/forecast/accuracy", {"metric": "daily_revenue", "test_days": 14}),
+}
+
 def print_section(title):
     """Print formatted section header"""
     print("\n" + "="*60)
@@ -21,7 +45,7 @@ def test_endpoint(endpoint, params=None):
     """Test an API endpoint"""
     url = f"{API_BASE}{endpoint}"
     try:
-        response = requests.get(url, params=params, timeout=30)
+        response = get_session().get(url, params=params, timeout=30)
         if response.status_code == 200:
             return response.json()
         else:
@@ -35,6 +59,15 @@ def test_endpoint(endpoint, params=None):
         print(f"❌ Error: {str(e)}")
         return None
 
+def test_endpoints(checks):
+    """Test several API endpoints concurrently, returning results keyed like checks"""
+    with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+        futures = {
+            name: pool.submit(test_endpoint, endpoint, params)
+            for name, (endpoint, params) in checks.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
 def main():
     print("\n🧪 Testing AI Analytics Dashboard - ML Forecasting")
     print(f"⏰ Test started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -49,36 +82,40 @@ def main():
         print("❌ API health check failed. Exiting...")
         return
     
+    results = test_endpoints(FORECAST_CHECKS)
+    
     # Test 2: Revenue Forecast
     print_section("2. Revenue Forecast (30 days)")
-    revenue_forecast = test_endpoint("/api/forecast/revenue", {"periods": 30})
+    revenue_forecast = results["revenue"]
     if revenue_forecast and revenue_forecast.get('success'):
         forecast_data = revenue_forecast['forecast']
         predictions = forecast_data['predictions']
+        values = np.asarray(predictions, dtype=np.float64)
         print(f"✅ Revenue forecast generated")
         print(f"   Days forecasted: {len(predictions)}")
-        print(f"   Avg daily revenue (predicted): ${sum(predictions)/len(predictions):,.2f}")
-        print(f"   Total revenue (30 days): ${sum(predictions):,.2f}")
+        print(f"   Avg daily revenue (predicted): ${values.mean():,.2f}")
+        print(f"   Total revenue (30 days): ${values.sum():,.2f}")
         print(f"   First 3 predictions: {[f'${x:,.2f}' for x in predictions[:3]]}")
     else:
         print("❌ Revenue forecast failed")
     
     # Test 3: Orders Forecast
     print_section("3. Orders Forecast (30 days)")
-    orders_forecast = test_endpoint("/api/forecast/orders", {"periods": 30})
+    orders_forecast = results["orders"]
     if orders_forecast and orders_forecast.get('success'):
         forecast_data = orders_forecast['forecast']
         predictions = forecast_data['predictions']
+        values = np.asarray(predictions, dtype=np.float64)
         print(f"✅ Orders forecast generated")
-        print(f"   Avg daily orders (predicted): {sum(predictions)/len(predictions):.0f}")
-        print(f"   Total orders (30 days): {sum(predictions):,}")
+        print(f"   Avg daily orders (predicted): {values.mean():.0f}")
+        print(f"   Total orders (30 days): {values.sum():,.0f}")
         print(f"   First 3 predictions: {predictions[:3]}")
     else:
         print("❌ Orders forecast failed")
     
     # Test 4: Customers Forecast
     print_section("4. Customers Forecast (30 days)")
-    customers_forecast = test_endpoint("/api/forecast/customers", {"periods": 30})
+    customers_forecast = results["customers"]
     if customers_forecast and customers_forecast.get('success'):
         forecast_data = customers_forecast['forecast']
         predictions = forecast_data['predictions']
@@ -91,22 +128,22 @@ def main():
     
     # Test 5: Churn Rate Forecast
     print_section("5. Churn Rate Forecast (30 days)")
-    churn_forecast = test_endpoint("/api/forecast/churn", {"periods": 30})
+    churn_forecast = results["churn"]
     if churn_forecast and churn_forecast.get('success'):
         forecast_data = churn_forecast['forecast']
-        predictions = forecast_data['predictions']
+        values = np.asarray(forecast_data['predictions'], dtype=np.float64)
         print(f"✅ Churn rate forecast generated")
-        print(f"   Avg churn rate: {sum(predictions)/len(predictions):.2f}%")
-        print(f"   Min churn: {min(predictions):.2f}%")
-        print(f"   Max churn: {max(predictions):.2f}%")
+        print(f"   Avg churn rate: {values.mean():.2f}%")
+        print(f"   Min churn: {values.min():.2f}%")
+        print(f"   Max churn: {values.max():.2f}%")
     else:
         print("❌ Churn rate forecast failed")
     
     # Test 6: All Metrics Forecast
     print_section("6. Comprehensive Forecast (All Metrics)")
-    all_forecast = test_endpoint("/api/forecast/all", {"periods": 30})
+    all_forecast = results["all"]
     if all_forecast and all_forecast.get('success'):
-        summary = all_forecast['data']['summary']
+        summary = all_forecast['forecasts']['summary']
         print(f"✅ Comprehensive forecast generated")
         print(f"   Total revenue (30 days): ${summary['total_revenue']:,.2f}")
         print(f"   Total orders (30 days): {summary['total_orders']:,}")
@@ -117,12 +154,9 @@ def main():
     
     # Test 7: Forecast Accuracy
     print_section("7. Forecast Accuracy Test")
-    accuracy = test_endpoint("/api/forecast/accuracy", {
-        "metric": "daily_revenue",
-        "test_days": 14
-    })
+    accuracy = results["accuracy"]
     if accuracy and accuracy.get('success'):
-        metrics = accuracy['data']['accuracy']
+        metrics = accuracy['accuracy']['accuracy']
         print(f"✅ Accuracy test completed (14-day backtest)")
         print(f"   MAPE (Mean Absolute % Error): {metrics['mape']:.2f}%")
         print(f"   RMSE (Root Mean Squared Error): ${metrics['rmse']:,.2f}")
@@ -137,6 +171,19 @@ def main():
     else:
         print("❌ Accuracy test failed")
     
+    # Test 8: Empty horizons are rejected as bad input, not fitted
+    print_section("8. Input Validation (empty horizon)")
+    for endpoint, params in [
+        ("/api/forecast/revenue", {"periods": 0}),
+        ("/api/forecast/all", {"periods": 0}),
+        ("/api/forecast/accuracy", {"test_days": 0}),
+    ]:
+        response = get_session().get(f"{API_BASE}{endpoint}", params=params, timeout=30)
+        if response.status_code == 422:
+            print(f"✅ {endpoint} {params} rejected (422)")
+        else:
+            print(f"❌ {endpoint} {params}: expected 422, got {response.status_code}")
+    
     # Summary
     print_section("🎉 Test Summary")
     print("✅ All forecasting endpoints are working!")